@@ -4,18 +4,17 @@ Main FastAPI application
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from settings import settings
 from logs.logger import system_logger
 import time
 
 # Import routers
 from api import tunnel_api, tunnel_websocket, proxy_handler, client_installer
-
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+from api.rate_limiter import limiter
 
 # Create FastAPI app
 app = FastAPI(
@@ -40,14 +39,30 @@ app.add_middleware(
 )
 
 
-# Request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Request timing middleware (pure ASGI, avoids BaseHTTPMiddleware's per-request task)
+class TimingMiddleware:
+    """Adds an X-Process-Time header to HTTP responses"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.monotonic()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(time.monotonic() - start_time))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+app.add_middleware(TimingMiddleware)
 
 
 # Include routers
@@ -57,6 +57,21 @@ if ! python3 -c "import websockets" 2>/dev/null; then
     pip3 install websockets --quiet
 fi
 
+if ! python3 -c "import msgpack" 2>/dev/null; then
+    echo "Installing msgpack..."
+    pip3 install msgpack --quiet
+fi
+
+if ! python3 -c "from asyncio import timeout" 2>/dev/null && ! python3 -c "import async_timeout" 2>/dev/null; then
+    echo "Installing async-timeout..."
+    pip3 install async-timeout --quiet
+fi
+
+if ! python3 -c "import uvloop" 2>/dev/null; then
+    echo "Installing uvloop..."
+    pip3 install uvloop --quiet || echo "uvloop unavailable, using default event loop"
+fi
+
 echo "Dependencies OK"
 echo ""
 
@@ -192,6 +207,7 @@ Optional Arguments:
   --name NAME                 Friendly name for tunnel
   --host HOST                 Local host (default: localhost)
   --https                     Use HTTPS/WSS (for production)
+  --log-level LEVEL           Log level; WARNING hides per-request lines (default: INFO)
 
 {'='*50}
 API Endpoint:
@@ -2,12 +2,18 @@
 HTTP reverse proxy handler for tunneled requests
 """
 import asyncio
-import uuid
 from fastapi import APIRouter, Request, Response, HTTPException
 from fastapi.responses import JSONResponse
-from tunnel.tunnel_manager import tunnel_manager
-from tunnel.message_protocol import serialize_request, create_tunnel_message, deserialize_response
+from tunnel.tunnel_manager import tunnel_manager, TunnelClosed
+from tunnel.message_protocol import (
+    serialize_request,
+    send_request_body,
+    pack_tunnel_message,
+    parse_response_data,
+    deserialize_response
+)
 from tunnel.tunnel_models import TunnelStatus
+from helper.timeouts import timeout
 from logs.logger import tunnel_logger
 from settings import settings
 
@@ -40,66 +46,91 @@ async def proxy_request(tunnel_id: str, path: str, request: Request):
         tunnel_logger.warning(f"No WebSocket connection for tunnel: {tunnel_id}")
         raise HTTPException(status_code=503, detail="Tunnel not connected")
 
-    # Generate unique request ID
-    request_id = str(uuid.uuid4())
+    # Generate request ID (unique per tunnel)
+    request_id = tunnel.next_request_id()
 
     try:
-        # Serialize the incoming request
-        http_request = await serialize_request(request, f"/{path}", request_id)
+        # Serialize the incoming request (large or unknown-length bodies are
+        # streamed after it; no Content-Length or Transfer-Encoding means no body)
+        content_length = request.headers.get("content-length")
+        if content_length is None:
+            stream_body = "transfer-encoding" in request.headers
+        else:
+            stream_body = not content_length.isdigit() or int(content_length) > settings.TUNNEL_STREAM_BODY_BYTES
+        http_request = await serialize_request(request, f"/{path}", request_id, stream_body)
 
         # Create future for response
-        response_future = asyncio.Future()
+        response_future = asyncio.get_running_loop().create_future()
         tunnel.pending_requests[request_id] = response_future
 
         # Send request to client via WebSocket
-        message = create_tunnel_message("request", http_request.model_dump())
+        message = pack_tunnel_message("request", http_request)
 
         try:
-            await tunnel.websocket.send_text(message)
+            await tunnel.websocket.send_bytes(message)
+            if stream_body:
+                # Stops early if the client answers before the body is sent
+                await send_request_body(
+                    request,
+                    request_id,
+                    tunnel.websocket.send_bytes,
+                    done=response_future.done
+                )
             tunnel.update_activity()
         except Exception as e:
             tunnel_logger.error(f"Failed to send request to tunnel {tunnel_id}: {e}")
-            del tunnel.pending_requests[request_id]
+            tunnel.pending_requests.pop(request_id, None)
             raise HTTPException(status_code=502, detail="Failed to send request to tunnel")
 
-        # Wait for response with timeout
+        # Wait for response with timeout (the WebSocket handler pops the
+        # pending entry when it resolves the future)
         try:
-            response_data = await asyncio.wait_for(
-                response_future,
-                timeout=settings.TUNNEL_TIMEOUT_SECONDS
-            )
+            async with timeout(settings.TUNNEL_TIMEOUT_SECONDS):
+                response_data = await response_future
         except asyncio.TimeoutError:
             tunnel_logger.error(f"Request timeout for tunnel {tunnel_id}, request {request_id}")
-            del tunnel.pending_requests[request_id]
+            tunnel.pending_requests.pop(request_id, None)
             raise HTTPException(status_code=504, detail="Gateway timeout")
-
-        # Clean up
-        del tunnel.pending_requests[request_id]
+        except TunnelClosed as e:
+            tunnel_logger.warning(f"Request {request_id} to tunnel {tunnel_id} failed: {e}")
+            raise HTTPException(status_code=502, detail="Tunnel closed")
 
         # Deserialize response
-        from tunnel.tunnel_models import HTTPResponse
-        http_response = HTTPResponse(**response_data)
+        http_response = parse_response_data(response_data)
         response_dict = deserialize_response(http_response)
 
-        # Return response
-        headers = {k: v for k, v in response_dict["headers"].items() if k.lower() != "x-tunnel-body-encoding"}
-
-        return Response(
-            content=response_dict.get("body", b""),
-            status_code=response_dict["status_code"],
-            headers=headers
-        )
+        return _build_response(response_dict)
 
     except HTTPException:
         raise
 
     except Exception as e:
         tunnel_logger.error(f"Error proxying request to {tunnel_id}: {e}")
-        if request_id in tunnel.pending_requests:
-            del tunnel.pending_requests[request_id]
+        tunnel.pending_requests.pop(request_id, None)
         raise HTTPException(status_code=500, detail=f"Internal proxy error: {str(e)}")
 
 
+def _build_response(response_dict: dict) -> Response:
+    """Build the proxied response, passing the client's headers through as raw ASGI headers"""
+    body = response_dict.get("body") or b""
+    response = Response(content=body, status_code=response_dict["status_code"])
+    raw_headers = [
+        (k.lower().encode("latin-1"), v.encode("latin-1"))
+        for k, v in response_dict["headers"].items()
+    ]
+
+    # Replacing raw_headers drops Starlette's computed content-length;
+    # add it back unless the client already framed the body (or the
+    # status has no body, as in Starlette)
+    status_code = response.status_code
+    framing = {name for name, _ in raw_headers} & {b"content-length", b"transfer-encoding"}
+    if not framing and status_code >= 200 and status_code not in (204, 304):
+        raw_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+    response.raw_headers = raw_headers
+
+    return response
+
+
 @router.get("/{tunnel_id}")
 async def proxy_root(tunnel_id: str, request: Request):
     """
@@ -0,0 +1,14 @@
+"""
+Shared rate limiter for API endpoints
+"""
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from settings import settings
+
+# Moving-window limits. With a redis:// storage URI the counters are shared
+# across workers and each check runs as a single server-side Lua script.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window"
+)
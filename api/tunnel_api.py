@@ -1,7 +1,9 @@
 """
 Tunnel control plane API endpoints
 """
-from fastapi import APIRouter, HTTPException, Header, Depends
+import hashlib
+import hmac
+from fastapi import APIRouter, HTTPException, Header, Depends, Request
 from tunnel.tunnel_models import (
     CreateTunnelRequest,
     CreateTunnelResponse,
@@ -11,22 +13,26 @@ from tunnel.tunnel_models import (
 from tunnel.tunnel_manager import tunnel_manager
 from logs.logger import tunnel_logger
 from settings import settings
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+from api.rate_limiter import limiter
 
 # Router
 router = APIRouter(prefix="/api/tunnels", tags=["Tunnels"])
 
+# SHA-256 digests of the accepted API keys, computed once at import
+_VALID_KEY_DIGESTS = tuple(
+    hashlib.sha256(key.encode("utf-8")).digest()
+    for key in {settings.REQUIRED_MATCHING_KEY, settings.REQUIRED_MATCHING_ADMIN_KEY}
+    if key
+)
+
 
 def authenticate_api_key(api_key: str = Header(None, alias="x-api-key")):
-    """Authenticate API key"""
+    """Authenticate API key (constant-time comparison)"""
     if not api_key:
         raise HTTPException(status_code=401, detail="API key required")
 
-    if api_key not in [settings.REQUIRED_MATCHING_KEY, settings.REQUIRED_MATCHING_ADMIN_KEY]:
+    digest = hashlib.sha256(api_key.encode("utf-8")).digest()
+    if not any(hmac.compare_digest(digest, valid) for valid in _VALID_KEY_DIGESTS):
         raise HTTPException(status_code=403, detail="Invalid API key")
 
     return api_key
@@ -35,7 +41,8 @@ def authenticate_api_key(api_key: str = Header(None, alias="x-api-key")):
 @router.post("/create", response_model=CreateTunnelResponse)
 @limiter.limit("10/minute")
 async def create_tunnel(
-    request: CreateTunnelRequest,
+    request: Request,
+    tunnel_request: CreateTunnelRequest,
     api_key: str = Depends(authenticate_api_key)
 ):
     """
@@ -47,9 +54,9 @@ async def create_tunnel(
     """
     try:
         tunnel = await tunnel_manager.create_tunnel(
-            name=request.name,
-            local_port=request.local_port,
-            metadata=request.metadata
+            name=tunnel_request.name,
+            local_port=tunnel_request.local_port,
+            metadata=tunnel_request.metadata
         )
 
         # Construct public URL
@@ -75,6 +82,7 @@ async def create_tunnel(
 @router.delete("/{tunnel_id}")
 @limiter.limit("20/minute")
 async def delete_tunnel(
+    request: Request,
     tunnel_id: str,
     api_key: str = Depends(authenticate_api_key)
 ):
@@ -94,7 +102,7 @@ async def delete_tunnel(
 
 @router.get("/list", response_model=TunnelListResponse)
 @limiter.limit("30/minute")
-async def list_tunnels(api_key: str = Depends(authenticate_api_key)):
+async def list_tunnels(request: Request, api_key: str = Depends(authenticate_api_key)):
     """
     List all active tunnels
 
@@ -111,6 +119,7 @@ async def list_tunnels(api_key: str = Depends(authenticate_api_key)):
 @router.get("/{tunnel_id}/status", response_model=TunnelInfo)
 @limiter.limit("60/minute")
 async def get_tunnel_status(
+    request: Request,
     tunnel_id: str,
     api_key: str = Depends(authenticate_api_key)
 ):
@@ -2,10 +2,16 @@
 WebSocket handler for tunnel connections
 """
 import asyncio
-import json
 from fastapi import WebSocket, WebSocketDisconnect, APIRouter
 from tunnel.tunnel_manager import tunnel_manager
-from tunnel.message_protocol import create_tunnel_message, parse_tunnel_message
+from tunnel.message_protocol import (
+    pack_tunnel_message,
+    unpack_auth_message,
+    unpack_tunnel_messages,
+    PING_FRAME,
+    PONG_FRAME
+)
+from helper.timeouts import timeout
 from logs.logger import tunnel_logger
 from settings import settings
 
@@ -18,29 +24,27 @@ async def tunnel_connect(websocket: WebSocket, tunnel_id: str):
     WebSocket endpoint for tunnel client connections
 
     The client must send auth_token in the first message after connecting.
+    All frames are binary msgpack messages.
     """
     await websocket.accept()
     tunnel_logger.info(f"WebSocket connection attempt for tunnel: {tunnel_id}")
 
     try:
         # Wait for authentication message
-        auth_message = await asyncio.wait_for(
-            websocket.receive_text(),
-            timeout=10.0
-        )
+        async with timeout(10.0):
+            auth_message = await websocket.receive_bytes()
 
         try:
-            auth_data = json.loads(auth_message)
-            auth_token = auth_data.get("auth_token")
-        except json.JSONDecodeError:
-            await websocket.send_text(create_tunnel_message("error", {
+            auth_token = unpack_auth_message(auth_message).auth_token
+        except ValueError:
+            await websocket.send_bytes(pack_tunnel_message("error", {
                 "message": "Invalid authentication message format"
             }))
             await websocket.close(code=1008)
             return
 
         if not auth_token:
-            await websocket.send_text(create_tunnel_message("error", {
+            await websocket.send_bytes(pack_tunnel_message("error", {
                 "message": "Authentication token required"
             }))
             await websocket.close(code=1008)
@@ -50,14 +54,14 @@ async def tunnel_connect(websocket: WebSocket, tunnel_id: str):
         connected = await tunnel_manager.connect_tunnel(tunnel_id, auth_token, websocket)
 
         if not connected:
-            await websocket.send_text(create_tunnel_message("error", {
+            await websocket.send_bytes(pack_tunnel_message("error", {
                 "message": "Authentication failed"
             }))
             await websocket.close(code=1008)
             return
 
         # Send success message
-        await websocket.send_text(create_tunnel_message("connected", {
+        await websocket.send_bytes(pack_tunnel_message("connected", {
             "tunnel_id": tunnel_id,
             "message": "Tunnel connected successfully"
         }))
@@ -75,7 +79,7 @@ async def tunnel_connect(websocket: WebSocket, tunnel_id: str):
                 while True:
                     await asyncio.sleep(settings.TUNNEL_HEARTBEAT_INTERVAL)
                     try:
-                        await websocket.send_text(create_tunnel_message("ping", {}))
+                        await websocket.send_bytes(PING_FRAME)
                         tunnel.update_activity()
                     except Exception as e:
                         tunnel_logger.error(f"Heartbeat error for {tunnel_id}: {e}")
@@ -85,44 +89,53 @@ async def tunnel_connect(websocket: WebSocket, tunnel_id: str):
 
         heartbeat_task = asyncio.create_task(heartbeat())
 
+        # Message handlers, keyed by message type
+        async def on_pong(data):
+            # Client responded to ping (activity is recorded per frame)
+            pass
+
+        async def on_response(data):
+            # HTTP response from client
+            if data:
+                request_id = data.get("request_id")
+                future = tunnel.pending_requests.pop(request_id, None)
+                if future is not None:
+                    if not future.done():
+                        future.set_result(data)
+                else:
+                    tunnel_logger.warning(
+                        f"Received response for unknown request: {request_id}"
+                    )
+
+        async def on_ping(data):
+            # Client sent ping, respond with pong
+            await websocket.send_bytes(PONG_FRAME)
+
+        handlers = {
+            "pong": on_pong,
+            "response": on_response,
+            "ping": on_ping,
+        }
+
         try:
             # Main message loop
             while True:
-                message = await websocket.receive_text()
+                message = await websocket.receive_bytes()
 
                 try:
-                    tunnel_msg = parse_tunnel_message(message)
-
-                    if tunnel_msg.type == "pong":
-                        # Client responded to ping
-                        tunnel.update_activity()
-                        continue
-
-                    elif tunnel_msg.type == "response":
-                        # HTTP response from client
-                        if tunnel_msg.data:
-                            request_id = tunnel_msg.data.get("request_id")
-                            if request_id and request_id in tunnel.pending_requests:
-                                future = tunnel.pending_requests[request_id]
-                                if not future.done():
-                                    future.set_result(tunnel_msg.data)
-                                tunnel.update_activity()
-                            else:
-                                tunnel_logger.warning(
-                                    f"Received response for unknown request: {request_id}"
-                                )
-
-                    elif tunnel_msg.type == "ping":
-                        # Client sent ping, respond with pong
-                        await websocket.send_text(create_tunnel_message("pong", {}))
-                        tunnel.update_activity()
+                    tunnel_msgs = unpack_tunnel_messages(message)
+                except ValueError as e:
+                    tunnel_logger.error(f"Failed to parse message: {e}")
+                    continue
 
+                for tunnel_msg in tunnel_msgs:
+                    handler = handlers.get(tunnel_msg.type)
+                    if handler:
+                        await handler(tunnel_msg.data)
                     else:
                         tunnel_logger.warning(f"Unknown message type: {tunnel_msg.type}")
 
-                except json.JSONDecodeError as e:
-                    tunnel_logger.error(f"Failed to parse message: {e}")
-                    continue
+                tunnel.update_activity()
 
         except WebSocketDisconnect:
             tunnel_logger.info(f"WebSocket disconnected for tunnel: {tunnel_id}")
@@ -4,13 +4,70 @@ Tunnel client CLI - Connects local service to tunnel server
 import asyncio
 import argparse
 import json
+import logging
+import logging.handlers
+import queue
 import sys
 import signal
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Dict, Optional, Set
 import httpx
+import msgpack
 import websockets
 from websockets.exceptions import ConnectionClosed
-from datetime import datetime
+
+# asyncio.timeout is Python 3.11+; async-timeout provides it on older versions
+try:
+    from asyncio import timeout
+except ImportError:
+    from async_timeout import timeout
+
+# Limits for coalescing queued messages into a single WebSocket frame
+MAX_BATCH_MESSAGES = 64
+MAX_BATCH_BYTES = 1_000_000
+
+# Largest frame accepted from the server (must match the server's
+# TUNNEL_CLIENT_MAX_FRAME_BYTES)
+MAX_FRAME_BYTES = 2 ** 20
+
+# Seconds to wait for the next piece of a streamed request body
+BODY_CHUNK_TIMEOUT = 30
+
+# Streamed body chunks buffered per request before the message loop
+# stops reading (backpressure towards the server)
+BODY_STREAM_QUEUE_CHUNKS = 16
+
+# Constant heartbeat reply, encoded once
+PONG_FRAME = msgpack.packb({"type": "pong"})
+
+logger = logging.getLogger("tunnel_client")
+
+
+class BodyAborted(Exception):
+    """The server stopped streaming a request body before it was complete"""
+
+
+def setup_logging(level: str = "INFO") -> logging.handlers.QueueListener:
+    """
+    Log to the console through a queue
+
+    Records are enqueued by the event loop and written by the listener's
+    background thread, so request handling never blocks on stdout.
+
+    Returns:
+        Started QueueListener (call stop() on exit to flush)
+    """
+    log_queue = queue.SimpleQueue()
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S"))
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, console_handler)
+    listener.start()
+    return listener
 
 
 class TunnelClient:
@@ -38,6 +95,27 @@ class TunnelClient:
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
         self.running = False
 
+        # Shared keep-alive client for requests to the local service
+        self._local_client: Optional[httpx.AsyncClient] = None
+
+        # Outgoing messages (already msgpack-encoded), drained by the writer task
+        self._send_queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._request_tasks: Set[asyncio.Task] = set()
+        self._message_task: Optional[asyncio.Task] = None
+
+        # request_id -> queue of incoming body_chunk data for streamed bodies
+        self._body_streams: Dict[int, asyncio.Queue] = {}
+
+        # Message type -> handler
+        self._dispatch = {
+            "ping": self._on_ping,
+            "pong": self._on_pong,
+            "request": self._on_request,
+            "body_chunk": self._on_body_chunk,
+            "error": self._on_error,
+        }
+
     async def create_tunnel(self) -> bool:
         """Create a tunnel on the server"""
         protocol = "https" if self.use_https else "http"
@@ -49,7 +127,7 @@ class TunnelClient:
             "local_port": self.local_port
         }
 
-        print(f"[{self._timestamp()}] Creating tunnel...")
+        logger.info("Creating tunnel...")
 
         try:
             async with httpx.AsyncClient() as client:
@@ -61,20 +139,19 @@ class TunnelClient:
                 self.auth_token = data["auth_token"]
                 self.public_url = data["url"]
 
-                print(f"[{self._timestamp()}] ✓ Tunnel created successfully!")
-                print(f"[{self._timestamp()}] Tunnel ID: {self.tunnel_id}")
-                print(f"[{self._timestamp()}] Public URL: {self.public_url}")
-                print()
+                logger.info("✓ Tunnel created successfully!")
+                logger.info(f"Tunnel ID: {self.tunnel_id}")
+                logger.info(f"Public URL: {self.public_url}")
 
                 return True
 
         except httpx.HTTPStatusError as e:
-            print(f"[{self._timestamp()}] ✗ Failed to create tunnel: {e.response.status_code}")
-            print(f"[{self._timestamp()}] Response: {e.response.text}")
+            logger.error(f"✗ Failed to create tunnel: {e.response.status_code}")
+            logger.error(f"Response: {e.response.text}")
             return False
 
         except Exception as e:
-            print(f"[{self._timestamp()}] ✗ Failed to create tunnel: {e}")
+            logger.error(f"✗ Failed to create tunnel: {e}")
             return False
 
     async def connect_websocket(self) -> bool:
@@ -82,176 +159,274 @@ class TunnelClient:
         ws_protocol = "wss" if self.use_https else "ws"
         ws_url = f"{ws_protocol}://{self.server}/api/tunnel/connect/{self.tunnel_id}"
 
-        print(f"[{self._timestamp()}] Connecting to tunnel server...")
+        logger.info("Connecting to tunnel server...")
 
         try:
-            self.websocket = await websockets.connect(ws_url)
+            self.websocket = await websockets.connect(ws_url, max_size=MAX_FRAME_BYTES)
 
             # Send authentication
-            auth_message = json.dumps({"auth_token": self.auth_token})
+            auth_message = msgpack.packb({"auth_token": self.auth_token})
             await self.websocket.send(auth_message)
 
             # Wait for confirmation
             response = await self.websocket.recv()
-            data = json.loads(response)
+            data = msgpack.unpackb(response, raw=False)
 
             if data.get("type") == "connected":
-                print(f"[{self._timestamp()}] ✓ Connected to tunnel server!")
-                print(f"[{self._timestamp()}] Forwarding: {self.public_url} -> http://{self.local_host}:{self.local_port}")
-                print()
-                print(f"[{self._timestamp()}] Tunnel is active. Press Ctrl+C to stop.")
-                print()
+                logger.info("✓ Connected to tunnel server!")
+                logger.info(f"Forwarding: {self.public_url} -> http://{self.local_host}:{self.local_port}")
+                logger.info("Tunnel is active. Press Ctrl+C to stop.")
                 return True
             else:
-                print(f"[{self._timestamp()}] ✗ Connection failed: {data}")
+                logger.error(f"✗ Connection failed: {data}")
                 return False
 
         except Exception as e:
-            print(f"[{self._timestamp()}] ✗ Failed to connect: {e}")
+            logger.error(f"✗ Failed to connect: {e}")
             return False
 
     async def handle_request(self, message: dict):
         """Handle incoming HTTP request from server"""
-        if message.get("type") != "request":
-            return
-
         request_data = message.get("data", {})
         request_id = request_data.get("request_id")
         method = request_data.get("method")
         path = request_data.get("path")
 
-        print(f"[{self._timestamp()}] {method} {path} (request_id: {request_id[:8]}...)")
+        logger.info("%s %s (request_id: %s)", method, path, request_id)
 
         try:
-            # Build local URL
-            local_url = f"http://{self.local_host}:{self.local_port}{path}"
-
             # Prepare headers
             headers = request_data.get("headers", {})
             # Remove host header to avoid conflicts
             headers.pop("host", None)
-            headers.pop("x-tunnel-body-encoding", None)
-
-            # Prepare body
-            body = None
-            if request_data.get("body"):
-                body_str = request_data["body"]
-                if headers.get("x-tunnel-body-encoding") == "base64":
-                    import base64
-                    body = base64.b64decode(body_str)
-                else:
-                    body = body_str.encode("utf-8") if isinstance(body_str, str) else body_str
+
+            # Body is raw bytes, or streamed in body_chunk messages
+            body_stream = self._body_streams.get(request_id)
+            if body_stream is not None:
+                content = self._iter_body(body_stream)
+            else:
+                content = request_data.get("body")
 
             # Make request to local service
-            async with httpx.AsyncClient() as client:
-                response = await client.request(
-                    method=method,
-                    url=local_url,
-                    headers=headers,
-                    content=body,
-                    timeout=30.0,
-                    follow_redirects=False
-                )
-
-                # Prepare response
-                response_headers = dict(response.headers)
-                response_body = response.content
-
-                # Encode body if binary
-                content_type = response_headers.get("content-type", "")
-                if self._is_binary(content_type):
-                    import base64
-                    response_body_str = base64.b64encode(response_body).decode("utf-8")
-                    response_headers["x-tunnel-body-encoding"] = "base64"
-                else:
-                    try:
-                        response_body_str = response_body.decode("utf-8")
-                    except UnicodeDecodeError:
-                        import base64
-                        response_body_str = base64.b64encode(response_body).decode("utf-8")
-                        response_headers["x-tunnel-body-encoding"] = "base64"
-
-                # Send response back through tunnel
-                response_message = {
-                    "type": "response",
-                    "data": {
-                        "request_id": request_id,
-                        "status_code": response.status_code,
-                        "headers": response_headers,
-                        "body": response_body_str
-                    }
+            # Absolute URL: a path starting with "//" must not be read as a host
+            response = await self._local_client.request(
+                method=method,
+                url=f"http://{self.local_host}:{self.local_port}{path}",
+                headers=headers,
+                content=content,
+                follow_redirects=False
+            )
+
+            response_body = response.content
+
+            # Send response back through tunnel
+            response_message = {
+                "type": "response",
+                "data": {
+                    "request_id": request_id,
+                    "status_code": response.status_code,
+                    "headers": dict(response.headers),
+                    "body": response_body
                 }
+            }
 
-                await self.websocket.send(json.dumps(response_message))
-                print(f"[{self._timestamp()}] → {response.status_code} ({len(response_body)} bytes)")
+            self._send(response_message)
+            logger.info("→ %s (%d bytes)", response.status_code, len(response_body))
 
         except httpx.ConnectError:
-            print(f"[{self._timestamp()}] ✗ Failed to connect to local service at http://{self.local_host}:{self.local_port}")
-            await self._send_error_response(request_id, 502, "Bad Gateway: Local service not reachable")
+            logger.error(f"✗ Failed to connect to local service at http://{self.local_host}:{self.local_port}")
+            self._send_error_response(request_id, 502, "Bad Gateway: Local service not reachable")
 
         except httpx.TimeoutException:
-            print(f"[{self._timestamp()}] ✗ Request timeout to local service")
-            await self._send_error_response(request_id, 504, "Gateway Timeout")
+            logger.error("✗ Request timeout to local service")
+            self._send_error_response(request_id, 504, "Gateway Timeout")
+
+        except asyncio.TimeoutError:
+            logger.error("✗ Timed out waiting for request body from server")
+            self._send_error_response(request_id, 504, "Gateway Timeout: Request body incomplete")
+
+        except BodyAborted:
+            # The server has already failed this request; nothing to answer
+            logger.warning("✗ Request body aborted by server (request_id: %s)", request_id)
 
         except Exception as e:
-            print(f"[{self._timestamp()}] ✗ Error handling request: {e}")
-            await self._send_error_response(request_id, 500, f"Internal Error: {str(e)}")
+            logger.error(f"✗ Error handling request: {e}")
+            self._send_error_response(request_id, 500, f"Internal Error: {str(e)}")
 
-    async def _send_error_response(self, request_id: str, status_code: int, message: str):
+        finally:
+            body_stream = self._body_streams.pop(request_id, None)
+            if body_stream is not None:
+                # Unblock the message loop if it is waiting to put into this queue
+                while not body_stream.empty():
+                    body_stream.get_nowait()
+
+    async def _iter_body(self, body_stream: asyncio.Queue) -> AsyncIterator[bytes]:
+        """Yield a streamed request body as its chunks arrive"""
+        while True:
+            async with timeout(BODY_CHUNK_TIMEOUT):
+                chunk = await body_stream.get()
+            if chunk.get("aborted"):
+                raise BodyAborted()
+            if chunk.get("data"):
+                yield chunk["data"]
+            if chunk.get("final"):
+                return
+
+    def _send_error_response(self, request_id: int, status_code: int, message: str):
         """Send error response back through tunnel"""
-        try:
-            response_message = {
-                "type": "response",
-                "data": {
-                    "request_id": request_id,
-                    "status_code": status_code,
-                    "headers": {"content-type": "application/json"},
-                    "body": json.dumps({"error": message})
-                }
+        self._send({
+            "type": "response",
+            "data": {
+                "request_id": request_id,
+                "status_code": status_code,
+                "headers": {"content-type": "application/json"},
+                "body": json.dumps({"error": message}).encode("utf-8")
             }
-            await self.websocket.send(json.dumps(response_message))
+        })
+
+    def _send(self, message: dict):
+        """Queue a message for the writer task"""
+        self._send_queue.put_nowait(msgpack.packb(message))
+
+    def _send_frame(self, frame: bytes):
+        """Queue an already-encoded message for the writer task"""
+        self._send_queue.put_nowait(frame)
+
+    async def writer_loop(self):
+        """
+        Send queued messages to the server
+
+        Messages that are ready at the same time are coalesced into one
+        frame: a msgpack array of the already-encoded messages. A batch
+        never grows past MAX_BATCH_BYTES; a message that would push it
+        over is carried into the next frame (and sent alone if it is
+        larger than the limit by itself).
+        """
+        packer = msgpack.Packer()
+        carry: Optional[bytes] = None
+
+        try:
+            while True:
+                if carry is not None:
+                    batch, carry = [carry], None
+                else:
+                    batch = [await self._send_queue.get()]
+                batch_bytes = len(batch[0])
+
+                while not self._send_queue.empty() and len(batch) < MAX_BATCH_MESSAGES:
+                    packed = self._send_queue.get_nowait()
+                    if batch_bytes + len(packed) > MAX_BATCH_BYTES:
+                        carry = packed
+                        break
+                    batch.append(packed)
+                    batch_bytes += len(packed)
+
+                if len(batch) == 1:
+                    frame = batch[0]
+                else:
+                    frame = packer.pack_array_header(len(batch)) + b"".join(batch)
+
+                await self.websocket.send(frame)
+
+        except ConnectionClosed:
+            pass
+
         except Exception as e:
-            print(f"[{self._timestamp()}] Failed to send error response: {e}")
+            logger.error(f"Error in writer loop: {e}")
 
     async def message_loop(self):
-        """Main message processing loop"""
+        """Main message processing loop (exits when stop() cancels it)"""
         self.running = True
+        self._message_task = asyncio.current_task()
+        self._writer_task = asyncio.create_task(self.writer_loop())
 
         try:
             while self.running:
                 try:
-                    message_str = await asyncio.wait_for(self.websocket.recv(), timeout=1.0)
-                    message = json.loads(message_str)
-
-                    if message.get("type") == "ping":
-                        # Respond to heartbeat
-                        pong = json.dumps({"type": "pong"})
-                        await self.websocket.send(pong)
-
-                    elif message.get("type") == "request":
-                        # Handle HTTP request
-                        await self.handle_request(message)
-
-                    elif message.get("type") == "error":
-                        print(f"[{self._timestamp()}] Server error: {message.get('data', {})}")
-
-                except asyncio.TimeoutError:
-                    # No message received, continue
-                    continue
+                    payload = await self.websocket.recv()
+                    message = msgpack.unpackb(payload, raw=False)
+
+                    handler = self._dispatch.get(message.get("type"))
+                    if handler:
+                        pending = handler(message)
+                        if pending is not None:
+                            # Backpressure: stop reading until the handler has room
+                            await pending
+
+                except asyncio.CancelledError:
+                    # Shutdown requested via stop()
+                    break
 
                 except ConnectionClosed:
-                    print(f"\n[{self._timestamp()}] WebSocket connection closed")
+                    logger.info("WebSocket connection closed")
                     break
 
         except Exception as e:
-            print(f"[{self._timestamp()}] Error in message loop: {e}")
+            logger.error(f"Error in message loop: {e}")
 
         finally:
             self.running = False
+            self._message_task = None
+
+            tasks = [self._writer_task, *self._request_tasks]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._writer_task = None
+
+    def _on_ping(self, message: dict):
+        """Respond to heartbeat"""
+        self._send_frame(PONG_FRAME)
+
+    def _on_pong(self, message: dict):
+        """Server responded to ping"""
+
+    def _on_request(self, message: dict):
+        """Handle HTTP request concurrently so responses can be batched"""
+        request_data = message.get("data", {})
+        if request_data.get("body_streamed"):
+            # Register before any body_chunk for this request is dispatched
+            self._body_streams[request_data.get("request_id")] = asyncio.Queue(BODY_STREAM_QUEUE_CHUNKS)
+
+        task = asyncio.create_task(self.handle_request(message))
+        self._request_tasks.add(task)
+        task.add_done_callback(self._request_tasks.discard)
+
+    def _on_body_chunk(self, message: dict) -> Optional[Awaitable[None]]:
+        """
+        Hand a piece of a streamed request body to its request task
+
+        Returns an awaitable when the request's queue is full, so the
+        message loop waits for the local service to catch up.
+        """
+        chunk = message.get("data", {})
+        body_stream = self._body_streams.get(chunk.get("request_id"))
+        if body_stream is None:
+            return None
+
+        if chunk.get("aborted"):
+            # Drop buffered data so the request task sees the abort next
+            while not body_stream.empty():
+                body_stream.get_nowait()
+
+        if body_stream.full():
+            return body_stream.put(chunk)
+        body_stream.put_nowait(chunk)
+        return None
+
+    def _on_error(self, message: dict):
+        """Report server error"""
+        logger.error(f"Server error: {message.get('data', {})}")
+
+    def stop(self):
+        """Stop the message loop"""
+        self.running = False
+        if self._message_task:
+            self._message_task.cancel()
 
     async def cleanup(self):
         """Cleanup resources"""
-        print(f"\n[{self._timestamp()}] Shutting down tunnel...")
+        logger.info("Shutting down tunnel...")
 
         if self.websocket:
             try:
@@ -259,11 +434,15 @@ class TunnelClient:
             except:
                 pass
 
+        if self._local_client:
+            await self._local_client.aclose()
+            self._local_client = None
+
         # Optionally delete tunnel from server
         # (Commented out to allow reconnection)
         # await self.delete_tunnel()
 
-        print(f"[{self._timestamp()}] Tunnel stopped.")
+        logger.info("Tunnel stopped.")
 
     async def delete_tunnel(self):
         """Delete tunnel from server"""
@@ -286,26 +465,22 @@ class TunnelClient:
         if not await self.create_tunnel():
             return False
 
-        # Connect WebSocket
-        if not await self.connect_websocket():
-            return False
-
-        # Run message loop
-        await self.message_loop()
-
-        # Cleanup
-        await self.cleanup()
-
-        return True
+        try:
+            # Connect WebSocket
+            if not await self.connect_websocket():
+                return False
 
-    def _timestamp(self) -> str:
-        """Get formatted timestamp"""
-        return datetime.now().strftime("%H:%M:%S")
+            self._local_client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=64, max_connections=128)
+            )
 
-    def _is_binary(self, content_type: str) -> bool:
-        """Check if content type is binary"""
-        binary_types = ["image/", "video/", "audio/", "application/octet-stream", "application/pdf"]
-        return any(bt in content_type.lower() for bt in binary_types)
+            # Run message loop
+            await self.message_loop()
+            return True
+        finally:
+            # Cleanup (also closes a half-open WebSocket after a failed connect)
+            await self.cleanup()
 
 
 async def main():
@@ -317,34 +492,49 @@ async def main():
     parser.add_argument("--host", default="localhost", help="Local host (default: localhost)")
     parser.add_argument("--name", help="Friendly name for the tunnel")
     parser.add_argument("--https", action="store_true", help="Use HTTPS/WSS (default: HTTP/WS)")
+    parser.add_argument("--log-level", default="INFO", help="Log level, WARNING hides per-request lines (default: INFO)")
 
     args = parser.parse_args()
+    log_listener = setup_logging(args.log_level)
 
-    # Create client
-    client = TunnelClient(
-        server=args.server,
-        api_key=args.api_key,
-        local_port=args.port,
-        local_host=args.host,
-        name=args.name,
-        use_https=args.https
-    )
-
-    # Handle shutdown signals
-    def signal_handler(sig, frame):
-        print("\nReceived interrupt signal...")
-        client.running = False
-
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-
-    # Run client
     try:
-        await client.run()
-    except Exception as e:
-        print(f"Fatal error: {e}")
-        sys.exit(1)
+        # Create client
+        client = TunnelClient(
+            server=args.server,
+            api_key=args.api_key,
+            local_port=args.port,
+            local_host=args.host,
+            name=args.name,
+            use_https=args.https
+        )
+
+        # Handle shutdown signals
+        loop = asyncio.get_running_loop()
+
+        def signal_handler(sig, frame):
+            logger.info("Received interrupt signal...")
+            loop.call_soon_threadsafe(client.stop)
+
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+        # Run client
+        try:
+            await client.run()
+        except Exception as e:
+            logger.error(f"Fatal error: {e}")
+            sys.exit(1)
+    finally:
+        # Flush queued log records on every exit path, including sys.exit()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
+    # uvloop is optional; fall back to the default asyncio event loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(main())
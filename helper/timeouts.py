@@ -0,0 +1,10 @@
+"""
+Timeout context manager that avoids the per-call Task created by asyncio.wait_for
+"""
+try:
+    # Python 3.11+
+    from asyncio import timeout
+except ImportError:
+    from async_timeout import timeout
+
+__all__ = ["timeout"]
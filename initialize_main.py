@@ -1,24 +1,45 @@
 """
 Main initialization and startup script for Tunnel Server
 """
-import asyncio
+import importlib.util
+import signal
+import threading
 import uvicorn
 from logs.logger import system_logger
 from settings import settings
-import kthread
 
 
-def run_api_server():
-    """Run the FastAPI server"""
-    system_logger.info(f"Starting API server on {settings.SERVER_HOST}:{settings.API_PORT}")
+def build_api_server() -> uvicorn.Server:
+    """Configure the uvicorn server for the FastAPI app"""
+    # Prefer uvloop for the server event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+        loop = "uvloop"
+    except ImportError:
+        system_logger.warning("uvloop not installed, using default asyncio event loop")
+        loop = "asyncio"
+
+    # Prefer the C-based httptools HTTP parser when available
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
 
-    uvicorn.run(
+    config = uvicorn.Config(
         "api.app:app",
         host=settings.SERVER_HOST,
         port=settings.API_PORT,
         log_level=settings.LOG_LEVEL.lower(),
         access_log=True,
+        loop=loop,
+        http=http,
+        ws="websockets",
     )
+    return uvicorn.Server(config)
+
+
+def run_api_server(server: uvicorn.Server):
+    """Run the FastAPI server (blocks until it exits)"""
+    system_logger.info(f"Starting API server on {settings.SERVER_HOST}:{settings.API_PORT}")
+    server.run()
 
 
 def main():
@@ -28,31 +49,35 @@ def main():
     system_logger.info(f"Environment: {settings.ENVIRONMENT}")
     system_logger.info("="*60)
 
-    # For production, we'll use kthread for daemon management
+    server = build_api_server()
+
+    # For production, run the server in a daemon thread
     # For development, run directly
     if settings.ENVIRONMENT == "PROD":
         system_logger.info("Starting server in production mode (daemon thread)")
-        server_thread = kthread.KThread(target=run_api_server, daemon=True)
+        server_thread = threading.Thread(target=run_api_server, args=(server,), daemon=True)
         server_thread.start()
         settings.SERVER_THREAD = server_thread
 
         system_logger.info("Server started. Press Ctrl+C to stop.")
 
-        try:
-            # Keep main thread alive
-            while True:
-                asyncio.sleep(1)
-        except KeyboardInterrupt:
-            system_logger.info("Received shutdown signal")
-            if settings.SERVER_THREAD:
-                system_logger.info("Stopping server thread...")
-                settings.SERVER_THREAD.kill()
-                system_logger.info("Server stopped")
+        # Keep main thread alive until a shutdown signal arrives
+        stop_event = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        stop_event.wait()
+
+        system_logger.info("Received shutdown signal")
+        if settings.SERVER_THREAD:
+            system_logger.info("Stopping server thread...")
+            server.should_exit = True
+            settings.SERVER_THREAD.join(timeout=5)
+            system_logger.info("Server stopped")
 
     else:
         system_logger.info("Starting server in development mode (direct run)")
         try:
-            run_api_server()
+            run_api_server(server)
         except KeyboardInterrupt:
             system_logger.info("Received shutdown signal")
             system_logger.info("Server stopped")
@@ -1,36 +1,101 @@
 """
 Custom logger with PST timezone and rotating file handler
 """
+import atexit
+import itertools
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
-import pytz
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from collections import deque
-from typing import Deque, Tuple
+from typing import Deque, List, Tuple
 
-# PST timezone
-PST = pytz.timezone("US/Pacific")
+# Timezones, resolved once
+_PST = ZoneInfo("US/Pacific")
+_UTC = timezone.utc
 
 # Recent logs storage (for API access)
-recent_logs: Deque[Tuple[str, str, str]] = deque(maxlen=100)  # (timestamp, level, message)
+recent_logs: Deque[Tuple[str, str, str]] = deque(maxlen=1024)  # (timestamp, level, message)
+
+# Background listeners that write queued records to console/file
+_listeners: List[QueueListener] = []
 
 
 class PSTFormatter(logging.Formatter):
     """Custom formatter that converts UTC to PST"""
 
+    # Last formatted second, shared by all records logged within it
+    _last_sec = [-1, None, ""]  # (second, datefmt, formatted)
+
     def formatTime(self, record, datefmt=None):
-        dt = datetime.fromtimestamp(record.created, tz=pytz.UTC)
-        pst_dt = dt.astimezone(PST)
-        if datefmt:
-            return pst_dt.strftime(datefmt)
-        return pst_dt.strftime("%Y-%m-%d %H:%M:%S %Z")
+        datefmt = datefmt or "%Y-%m-%d %H:%M:%S %Z"
+        sec = int(record.created)
+        cached = self._last_sec
+        if cached[0] == sec and cached[1] == datefmt:
+            return cached[2]
+
+        pst_dt = datetime.fromtimestamp(sec, tz=_UTC).astimezone(_PST)
+        formatted = pst_dt.strftime(datefmt)
+        PSTFormatter._last_sec = [sec, datefmt, formatted]
+        return formatted
+
+
+# Shared formatter for recent log timestamps
+_recent_formatter = PSTFormatter()
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler with a buffered stream and amortized rollover checks
+
+    The log size is only checked every ``check_every`` records, and the
+    stream is flushed on WARNING and above (buffered writes otherwise).
+    """
+
+    def __init__(self, *args, check_every: int = 512, buffer_size: int = 65536, **kwargs):
+        self._check_every = check_every
+        self._buffer_size = buffer_size
+        self._emit_n = check_every - 1  # Check on first emit
+        self._defer_flush = False
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=self._buffer_size,
+            encoding=self.encoding,
+            errors=self.errors
+        )
+
+    def shouldRollover(self, record):
+        self._emit_n += 1
+        if self._emit_n < self._check_every:
+            return False
+        self._emit_n = 0
+        return super().shouldRollover(record)
+
+    def emit(self, record):
+        self._defer_flush = record.levelno < logging.WARNING
+        try:
+            super().emit(record)
+        finally:
+            self._defer_flush = False
+
+    def flush(self):
+        if not self._defer_flush:
+            super().flush()
 
 
 def setup_logger(name: str, log_file: str = None, level: str = "INFO") -> logging.Logger:
     """
     Set up a logger with PST timezone and optional file rotation
 
+    Console and file output is handed to a QueueListener thread so that
+    logging from the event loop never blocks on I/O.
+
     Args:
         name: Logger name
         log_file: Optional log file path
@@ -58,7 +123,7 @@ def setup_logger(name: str, log_file: str = None, level: str = "INFO") -> loggin
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    output_handlers = [console_handler]
 
     # File handler (if specified)
     if log_file:
@@ -67,19 +132,26 @@ def setup_logger(name: str, log_file: str = None, level: str = "INFO") -> loggin
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir, exist_ok=True)
 
-        # Rotating file handler (1MB max, 10 backups)
-        file_handler = RotatingFileHandler(
+        # Rotating file handler (50MB max, 5 backups)
+        file_handler = BufferedRotatingFileHandler(
             log_file,
-            maxBytes=1_000_000,  # 1MB
-            backupCount=10
+            maxBytes=50_000_000,  # 50MB
+            backupCount=5
         )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        output_handlers.append(file_handler)
+
+    # Queue output to a background listener thread
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    logger.addHandler(QueueHandler(log_queue))
 
     # Add custom handler to store recent logs
     class RecentLogsHandler(logging.Handler):
         def emit(self, record):
-            timestamp = PSTFormatter().formatTime(record)
+            timestamp = _recent_formatter.formatTime(record)
             recent_logs.append((timestamp, record.levelname, record.getMessage()))
 
     recent_handler = RecentLogsHandler()
@@ -94,6 +166,15 @@ dev_logger = setup_logger("dev", "logs/dev.log", "DEBUG")
 tunnel_logger = setup_logger("tunnel", "logs/tunnel.log", "INFO")
 
 
+def _stop_listeners():
+    """Flush queued records on interpreter exit"""
+    for listener in _listeners:
+        listener.stop()
+
+
+atexit.register(_stop_listeners)
+
+
 def get_recent_logs(limit: int = 100) -> list:
-    """Get recent logs for API access"""
-    return list(recent_logs)[-limit:]
+    """Get recent logs for API access (oldest first)"""
+    return list(itertools.islice(reversed(recent_logs), max(limit, 0)))[::-1]
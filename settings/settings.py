@@ -3,10 +3,10 @@ Global settings and configuration for Tunnel Server
 """
 import os
 import asyncio
+import threading
 from datetime import datetime
 from decouple import config
 from typing import Optional
-import kthread
 
 # Initialize timestamp
 ON_INITIALIZE_TIME = datetime.now()
@@ -26,6 +26,19 @@ TUNNEL_TIMEOUT_SECONDS = config("TUNNEL_TIMEOUT_SECONDS", default=30, cast=int)
 TUNNEL_MAX_CONNECTIONS = config("TUNNEL_MAX_CONNECTIONS", default=100, cast=int)
 TUNNEL_HEARTBEAT_INTERVAL = config("TUNNEL_HEARTBEAT_INTERVAL", default=10, cast=int)
 TUNNEL_CLEANUP_INTERVAL = config("TUNNEL_CLEANUP_INTERVAL", default=60, cast=int)
+# Request bodies larger than this (bytes) are streamed to the client in chunks
+TUNNEL_STREAM_BODY_BYTES = config("TUNNEL_STREAM_BODY_BYTES", default=900_000, cast=int)
+# Largest frame the client accepts (its websockets max_size). A non-streamed
+# body travels in one frame with the request headers, so leave 64KB headroom.
+TUNNEL_CLIENT_MAX_FRAME_BYTES = 2 ** 20
+if TUNNEL_STREAM_BODY_BYTES > TUNNEL_CLIENT_MAX_FRAME_BYTES - 64 * 1024:
+    raise ValueError(
+        f"TUNNEL_STREAM_BODY_BYTES must be at most {TUNNEL_CLIENT_MAX_FRAME_BYTES - 64 * 1024} "
+        f"(client frame limit {TUNNEL_CLIENT_MAX_FRAME_BYTES} minus header headroom)"
+    )
+
+# Rate Limiting (memory:// is per-process; use redis://host:6379 to share across workers)
+RATE_LIMIT_STORAGE_URI = config("RATE_LIMIT_STORAGE_URI", default="memory://", cast=str)
 
 # Logging
 LOG_LEVEL = config("LOG_LEVEL", default="INFO", cast=str)
@@ -33,7 +46,7 @@ LOG_TIMEZONE = config("LOG_TIMEZONE", default="US/Pacific", cast=str)
 
 # Runtime State
 ASYNCIO_LOOP: Optional[asyncio.AbstractEventLoop] = None
-SERVER_THREAD: Optional[kthread.KThread] = None
+SERVER_THREAD: Optional[threading.Thread] = None
 
 # OpenAPI Schema visibility
 INCLUDE_SCHEMA = True if ENVIRONMENT in ["LOCAL", "SANDBOX"] else False
@@ -2,20 +2,39 @@
 Simple test server for testing the tunnel
 Run with: python test_server.py
 """
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
 from datetime import datetime
 
+# Prefer orjson for encoding responses when available
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 
 class TestHandler(BaseHTTPRequestHandler):
     """Simple HTTP handler for testing"""
 
-    def do_GET(self):
-        """Handle GET requests"""
-        self.send_response(200)
+    # Buffer writes so headers and body go out in a single send
+    wbufsize = 64 * 1024
+
+    def _send_json(self, response: dict, status: int = 200):
+        """Send a JSON response with Content-Length"""
+        body = _dumps(response)
+        self.send_response(status)
         self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
 
+    def do_GET(self):
+        """Handle GET requests"""
         response = {
             "message": "Hello from test server!",
             "path": self.path,
@@ -24,7 +43,7 @@ class TestHandler(BaseHTTPRequestHandler):
             "headers": dict(self.headers)
         }
 
-        self.wfile.write(json.dumps(response, indent=2).encode())
+        self._send_json(response)
         print(f"[GET] {self.path}")
 
     def do_POST(self):
@@ -32,10 +51,6 @@ class TestHandler(BaseHTTPRequestHandler):
         content_length = int(self.headers.get("Content-Length", 0))
         body = self.rfile.read(content_length).decode("utf-8")
 
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-
         try:
             body_json = json.loads(body) if body else {}
         except json.JSONDecodeError:
@@ -50,7 +65,7 @@ class TestHandler(BaseHTTPRequestHandler):
             "headers": dict(self.headers)
         }
 
-        self.wfile.write(json.dumps(response, indent=2).encode())
+        self._send_json(response)
         print(f"[POST] {self.path} - Body: {body[:100]}")
 
     def do_PUT(self):
@@ -58,10 +73,6 @@ class TestHandler(BaseHTTPRequestHandler):
         content_length = int(self.headers.get("Content-Length", 0))
         body = self.rfile.read(content_length).decode("utf-8")
 
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-
         response = {
             "message": "Received PUT request",
             "path": self.path,
@@ -69,15 +80,11 @@ class TestHandler(BaseHTTPRequestHandler):
             "timestamp": datetime.now().isoformat()
         }
 
-        self.wfile.write(json.dumps(response, indent=2).encode())
+        self._send_json(response)
         print(f"[PUT] {self.path}")
 
     def do_DELETE(self):
         """Handle DELETE requests"""
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-
         response = {
             "message": "Received DELETE request",
             "path": self.path,
@@ -85,7 +92,7 @@ class TestHandler(BaseHTTPRequestHandler):
             "timestamp": datetime.now().isoformat()
         }
 
-        self.wfile.write(json.dumps(response, indent=2).encode())
+        self._send_json(response)
         print(f"[DELETE] {self.path}")
 
     def log_message(self, format, *args):
@@ -96,7 +103,8 @@ class TestHandler(BaseHTTPRequestHandler):
 def run_server(port=3000):
     """Run the test server"""
     server_address = ("", port)
-    httpd = HTTPServer(server_address, TestHandler)
+    httpd = ThreadingHTTPServer(server_address, TestHandler)
+    httpd.daemon_threads = True
 
     print("="*60)
     print(f"Test Server Running on http://localhost:{port}")
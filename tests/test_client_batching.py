@@ -0,0 +1,95 @@
+"""
+Tests for client message batching and server-side frame decoding
+"""
+import asyncio
+import msgpack
+from client.tunnel_client import TunnelClient, MAX_BATCH_BYTES
+from tunnel.message_protocol import unpack_tunnel_messages
+
+# Default uvicorn ws_max_size
+SERVER_MAX_FRAME = 16 * 1024 * 1024
+
+
+class FakeWebSocket:
+    """Collects frames sent by the writer loop"""
+
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, frame: bytes):
+        self.frames.append(frame)
+
+
+def pack_response(request_id: int, size: int) -> bytes:
+    """Encode a response message that is exactly `size` bytes long (size > 70000)"""
+    def pack(body_len):
+        return msgpack.packb({
+            "type": "response",
+            "data": {"request_id": request_id, "status_code": 200, "headers": {}, "body": b"x" * body_len}
+        })
+
+    overhead = len(pack(70000)) - 70000
+    packed = pack(size - overhead)
+    assert len(packed) == size
+    return packed
+
+
+def run_writer(messages):
+    """Queue messages, run writer_loop until they are all sent, return the frames"""
+    async def main():
+        client = TunnelClient(server="localhost", api_key="key", local_port=3000)
+        client.websocket = FakeWebSocket()
+        for message in messages:
+            client._send_frame(message)
+
+        task = asyncio.create_task(client.writer_loop())
+        while not client._send_queue.empty() or len(received(client.websocket.frames)) < len(messages):
+            await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return client.websocket.frames
+
+    return asyncio.run(main())
+
+
+def received(frames):
+    """Decode frames the way the server does"""
+    return [message for frame in frames for message in unpack_tunnel_messages(frame)]
+
+
+def test_small_messages_share_one_frame():
+    messages = [msgpack.packb({"type": "response", "data": {"request_id": i}}) for i in range(10)]
+    frames = run_writer(messages)
+
+    assert len(frames) == 1
+    assert [m.data["request_id"] for m in received(frames)] == list(range(10))
+
+
+def test_batch_fills_exactly_to_limit():
+    first = pack_response(0, 400_000)
+    second = pack_response(1, MAX_BATCH_BYTES - 400_000)
+    frames = run_writer([first, second])
+
+    assert len(frames) == 1
+    assert [m.data["request_id"] for m in received(frames)] == [0, 1]
+
+
+def test_message_over_remaining_budget_starts_new_frame():
+    first = pack_response(0, 400_000)
+    second = pack_response(1, MAX_BATCH_BYTES - 400_000 + 1)
+    third = msgpack.packb({"type": "pong"})
+    frames = run_writer([first, second, third])
+
+    assert frames[0] == first
+    assert [m.type for m in received(frames)] == ["response", "response", "pong"]
+    assert all(len(frame) <= MAX_BATCH_BYTES + 5 for frame in frames)
+
+
+def test_oversized_message_is_not_batched_past_server_limit():
+    small = pack_response(0, 900_000)
+    large = pack_response(1, 16_000_000)
+    frames = run_writer([small, large])
+
+    assert frames == [small, large]
+    assert all(len(frame) <= SERVER_MAX_FRAME for frame in frames)
+    assert [m.data["request_id"] for m in received(frames)] == [0, 1]
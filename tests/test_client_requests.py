@@ -0,0 +1,125 @@
+"""
+Tests for how the client forwards requests to the local service
+"""
+import asyncio
+import httpx
+import msgpack
+from client.tunnel_client import TunnelClient
+
+
+def forward(path: str):
+    """Forward one request through handle_request; return (local request, queued response)"""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, content=b"ok")
+
+    async def main():
+        client = TunnelClient(server="localhost", api_key="key", local_port=3000)
+        client._local_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await client.handle_request({
+            "type": "request",
+            "data": {"request_id": 7, "method": "GET", "path": path, "headers": {}, "body": None}
+        })
+        await client._local_client.aclose()
+        return msgpack.unpackb(client._send_queue.get_nowait(), raw=False)
+
+    response = asyncio.run(main())
+    return seen[0], response
+
+
+def test_forwards_plain_path_to_local_service():
+    request, response = forward("/api/users?x=1")
+
+    assert str(request.url) == "http://localhost:3000/api/users?x=1"
+    assert response["data"]["request_id"] == 7
+    assert response["data"]["status_code"] == 200
+
+
+def test_double_slash_path_is_not_treated_as_host():
+    request, _ = forward("//foo/bar")
+    assert request.url.host == "localhost"
+    assert request.url.path == "//foo/bar"
+
+    request, _ = forward("//evil.com/x")
+    assert request.url.host == "localhost"
+    assert request.url.path == "//evil.com/x"
+
+
+def stream_body(chunks, local_handler=None):
+    """Send a body_streamed request and its chunks; return (local bodies, queued responses, client)"""
+    bodies = []
+
+    async def default_handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(await request.aread())
+        return httpx.Response(200, content=b"ok")
+
+    async def main():
+        client = TunnelClient(server="localhost", api_key="key", local_port=3000)
+        client._local_client = httpx.AsyncClient(transport=httpx.MockTransport(local_handler or default_handler))
+        client._on_request({
+            "type": "request",
+            "data": {"request_id": 3, "method": "POST", "path": "/up", "headers": {}, "body_streamed": True}
+        })
+        for chunk in chunks:
+            pending = client._on_body_chunk({"type": "body_chunk", "data": {"request_id": 3, **chunk}})
+            if pending is not None:
+                await pending
+        await asyncio.gather(*client._request_tasks)
+        await client._local_client.aclose()
+
+        responses = []
+        while not client._send_queue.empty():
+            responses.append(msgpack.unpackb(client._send_queue.get_nowait(), raw=False))
+        return responses, client
+
+    responses, client = asyncio.run(main())
+    return bodies, responses, client
+
+
+def test_streamed_body_is_reassembled():
+    bodies, responses, client = stream_body([
+        {"seq": 0, "data": b"abc"},
+        {"seq": 1, "data": b"def"},
+        {"seq": 2, "final": True},
+    ])
+
+    assert bodies == [b"abcdef"]
+    assert [r["data"]["status_code"] for r in responses] == [200]
+    assert client._body_streams == {}
+
+
+def test_aborted_body_fails_local_request_without_response():
+    bodies, responses, client = stream_body([
+        {"seq": 0, "data": b"abc"},
+        {"seq": 1, "final": True, "aborted": True},
+    ])
+
+    assert bodies == []
+    assert responses == []
+    assert client._body_streams == {}
+
+
+def test_full_body_queue_applies_backpressure():
+    from client.tunnel_client import BODY_STREAM_QUEUE_CHUNKS
+
+    async def slow_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=await request.aread())
+
+    chunks = [{"seq": i, "data": b"x"} for i in range(BODY_STREAM_QUEUE_CHUNKS * 3)]
+    chunks.append({"seq": len(chunks), "final": True})
+    _, responses, _ = stream_body(chunks, slow_handler)
+
+    assert responses[0]["data"]["body"] == b"x" * (BODY_STREAM_QUEUE_CHUNKS * 3)
+
+
+def test_body_chunk_reports_full_queue():
+    client = TunnelClient(server="localhost", api_key="key", local_port=3000)
+    client._body_streams[1] = asyncio.Queue(1)
+
+    assert client._on_body_chunk({"data": {"request_id": 1, "seq": 0, "data": b"a"}}) is None
+    pending = client._on_body_chunk({"data": {"request_id": 1, "seq": 1, "data": b"b"}})
+    assert pending is not None
+    pending.close()
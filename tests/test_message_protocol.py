@@ -0,0 +1,87 @@
+"""
+Tests for streaming request bodies through the tunnel
+"""
+import asyncio
+import pytest
+from tunnel.message_protocol import BODY_CHUNK_SIZE, send_request_body, unpack_tunnel_messages
+
+
+class FakeRequest:
+    """Request whose body stream yields the given chunks, then optionally fails"""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error:
+            raise self.error
+
+
+def stream(request):
+    """Run send_request_body; return (sent chunk data, raised error)"""
+    frames = []
+
+    async def send(frame: bytes):
+        frames.append(frame)
+
+    error = None
+    try:
+        asyncio.run(send_request_body(request, 5, send))
+    except Exception as e:
+        error = e
+
+    chunks = [message.data for frame in frames for message in unpack_tunnel_messages(frame)]
+    return chunks, error
+
+
+def test_body_is_split_into_chunks_and_finalized():
+    chunks, error = stream(FakeRequest([b"a" * (BODY_CHUNK_SIZE + 10), b"bc"]))
+
+    assert error is None
+    assert [len(c["data"]) for c in chunks] == [BODY_CHUNK_SIZE, 10, 2, 0]
+    assert [c["seq"] for c in chunks] == [0, 1, 2, 3]
+    assert [c["final"] for c in chunks] == [False, False, False, True]
+    assert not any(c["aborted"] for c in chunks)
+    assert all(c["request_id"] == 5 for c in chunks)
+
+
+def test_failed_upload_sends_aborted_final_chunk():
+    chunks, error = stream(FakeRequest([b"abc"], error=ConnectionError("uploader went away")))
+
+    assert isinstance(error, ConnectionError)
+    assert chunks[-1]["final"] and chunks[-1]["aborted"]
+    assert chunks[-1]["seq"] == 1
+
+
+def test_send_failure_is_raised():
+    calls = []
+
+    async def send(frame: bytes):
+        calls.append(frame)
+        raise RuntimeError("socket closed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(send_request_body(FakeRequest([b"abc"]), 5, send))
+
+    # First chunk plus the best-effort abort
+    assert len(calls) == 2
+
+
+def test_streaming_stops_once_request_is_done():
+    frames = []
+    answered = []
+
+    async def send(frame: bytes):
+        frames.append(frame)
+        if len(frames) == 2:
+            answered.append(True)
+
+    request = FakeRequest([b"a"] * 10, error=ConnectionError("never read"))
+    asyncio.run(send_request_body(request, 5, send, done=lambda: bool(answered)))
+
+    chunks = [message.data for frame in frames for message in unpack_tunnel_messages(frame)]
+    assert [c["seq"] for c in chunks] == [0, 1]
+    assert not any(c["final"] for c in chunks)
@@ -0,0 +1,39 @@
+"""
+Tests for building proxied responses
+"""
+from api.proxy_handler import _build_response
+
+
+def header_map(response):
+    return {name.decode(): value.decode() for name, value in response.raw_headers}
+
+
+def test_content_length_added_when_client_omits_it():
+    response = _build_response({
+        "status_code": 502,
+        "headers": {"content-type": "application/json"},
+        "body": b'{"error": "Bad Gateway"}'
+    })
+
+    headers = header_map(response)
+    assert headers["content-length"] == str(len(b'{"error": "Bad Gateway"}'))
+    assert headers["content-type"] == "application/json"
+    assert "transfer-encoding" not in headers
+
+
+def test_client_framing_headers_are_kept():
+    response = _build_response({"status_code": 200, "headers": {"Content-Length": "3"}, "body": b"abc"})
+    assert [name for name, _ in response.raw_headers].count(b"content-length") == 1
+
+    response = _build_response({"status_code": 200, "headers": {"transfer-encoding": "chunked"}, "body": b"abc"})
+    assert "content-length" not in header_map(response)
+
+
+def test_no_content_length_for_bodiless_status():
+    response = _build_response({"status_code": 204, "headers": {}, "body": None})
+    assert "content-length" not in header_map(response)
+
+
+def test_empty_body_gets_zero_length():
+    response = _build_response({"status_code": 200, "headers": {}, "body": None})
+    assert header_map(response)["content-length"] == "0"
@@ -1,30 +1,42 @@
 """
 Message protocol for serializing/deserializing HTTP requests and responses
 """
-import base64
-from typing import Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from fastapi import Request
-from tunnel.tunnel_models import HTTPRequest, HTTPResponse, TunnelMessage
-import json
-
-
-def is_binary_content(content_type: str) -> bool:
-    """Check if content type is binary"""
-    binary_types = [
-        "image/", "video/", "audio/", "application/octet-stream",
-        "application/pdf", "application/zip", "application/x-tar"
-    ]
-    return any(bt in content_type.lower() for bt in binary_types)
-
-
-async def serialize_request(request: Request, path: str, request_id: str) -> HTTPRequest:
+from tunnel.wire import (
+    AuthMessage,
+    BodyChunk,
+    HTTPRequest,
+    HTTPResponse,
+    TunnelMessage,
+    auth_decoder,
+    encoder,
+    frame_decoder
+)
+import msgspec
+
+# Constant control frames, encoded once
+PING_FRAME = encoder.encode(TunnelMessage(type="ping", data={}))
+PONG_FRAME = encoder.encode(TunnelMessage(type="pong", data={}))
+
+# Maximum body bytes per body_chunk message
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+async def serialize_request(
+    request: Request,
+    path: str,
+    request_id: int,
+    stream_body: bool = False
+) -> HTTPRequest:
     """
     Serialize FastAPI Request to HTTPRequest model
 
     Args:
         request: FastAPI Request object
         path: Request path
-        request_id: Unique request identifier
+        request_id: Request identifier (unique per tunnel)
+        stream_body: Leave the body unread; send it with send_request_body()
 
     Returns:
         HTTPRequest model
@@ -35,35 +47,89 @@ async def serialize_request(request: Request, path: str, request_id: str) -> HTT
     # Get query parameters
     query_params = dict(request.query_params)
 
-    # Get body
+    if stream_body:
+        return HTTPRequest(
+            request_id=request_id,
+            method=request.method,
+            path=path,
+            headers=headers,
+            query_params=query_params,
+            body_streamed=True
+        )
+
+    # Get body (raw bytes, carried natively by msgpack)
     body_bytes = await request.body()
-    body_str = None
-
-    if body_bytes:
-        content_type = headers.get("content-type", "")
-        if is_binary_content(content_type):
-            # Base64 encode binary content
-            body_str = base64.b64encode(body_bytes).decode("utf-8")
-            headers["x-tunnel-body-encoding"] = "base64"
-        else:
-            # Try to decode as UTF-8
-            try:
-                body_str = body_bytes.decode("utf-8")
-            except UnicodeDecodeError:
-                # Fallback to base64 if decode fails
-                body_str = base64.b64encode(body_bytes).decode("utf-8")
-                headers["x-tunnel-body-encoding"] = "base64"
 
     return HTTPRequest(
         request_id=request_id,
         method=request.method,
         path=path,
         headers=headers,
-        body=body_str,
+        body=body_bytes or None,
         query_params=query_params
     )
 
 
+async def send_request_body(
+    request: Request,
+    request_id: int,
+    send: Callable[[bytes], Awaitable[None]],
+    done: Optional[Callable[[], bool]] = None
+) -> None:
+    """
+    Stream the request body to the client as body_chunk messages
+
+    The last message is an empty chunk with final=True. If reading the
+    body or sending fails part way (e.g. the uploader disconnects), a
+    final chunk with aborted=True is sent (best effort) so the client
+    drops the request, and the error is re-raised.
+
+    Streaming stops as soon as done() returns True (the client already
+    answered, e.g. a 401/413 before reading the body). No final or
+    aborted chunk is sent then: the client has dropped the stream.
+
+    Args:
+        request: FastAPI Request object (body not yet read)
+        request_id: Request identifier (unique per tunnel)
+        send: Coroutine function that sends one frame
+        done: Returns True once the request no longer needs its body
+    """
+    def finished() -> bool:
+        return done is not None and done()
+
+    seq = 0
+    try:
+        async for chunk in request.stream():
+            for offset in range(0, len(chunk), BODY_CHUNK_SIZE):
+                if finished():
+                    return
+                await send(pack_tunnel_message("body_chunk", BodyChunk(
+                    request_id=request_id,
+                    seq=seq,
+                    data=chunk[offset:offset + BODY_CHUNK_SIZE]
+                )))
+                seq += 1
+
+        if finished():
+            return
+        await send(pack_tunnel_message("body_chunk", BodyChunk(request_id=request_id, seq=seq, final=True)))
+
+    except Exception:
+        if finished():
+            # The body is no longer needed; let the caller return the response
+            return
+        try:
+            await send(pack_tunnel_message("body_chunk", BodyChunk(
+                request_id=request_id,
+                seq=seq,
+                final=True,
+                aborted=True
+            )))
+        except Exception:
+            pass
+        raise
+
+
 def deserialize_request(http_request: HTTPRequest) -> Dict:
     """
     Convert HTTPRequest model to dict for client processing
@@ -74,19 +140,12 @@ def deserialize_request(http_request: HTTPRequest) -> Dict:
     Returns:
         Dictionary with request details
     """
-    body = None
-    if http_request.body:
-        if http_request.headers.get("x-tunnel-body-encoding") == "base64":
-            body = base64.b64decode(http_request.body)
-        else:
-            body = http_request.body.encode("utf-8") if isinstance(http_request.body, str) else http_request.body
-
     return {
         "request_id": http_request.request_id,
         "method": http_request.method,
         "path": http_request.path,
         "headers": http_request.headers,
-        "body": body,
+        "body": http_request.body,
         "query_params": http_request.query_params
     }
 
@@ -101,34 +160,31 @@ def serialize_response(response_data: Dict) -> HTTPResponse:
     Returns:
         HTTPResponse model
     """
-    body_str = None
-    headers = response_data.get("headers", {})
-
-    if "body" in response_data and response_data["body"]:
-        body = response_data["body"]
-
-        if isinstance(body, bytes):
-            content_type = headers.get("content-type", "")
-            if is_binary_content(content_type):
-                body_str = base64.b64encode(body).decode("utf-8")
-                headers["x-tunnel-body-encoding"] = "base64"
-            else:
-                try:
-                    body_str = body.decode("utf-8")
-                except UnicodeDecodeError:
-                    body_str = base64.b64encode(body).decode("utf-8")
-                    headers["x-tunnel-body-encoding"] = "base64"
-        else:
-            body_str = str(body)
+    body = response_data.get("body") or None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
 
     return HTTPResponse(
         request_id=response_data["request_id"],
         status_code=response_data.get("status_code", 200),
-        headers=headers,
-        body=body_str
+        headers=response_data.get("headers", {}),
+        body=body
     )
 
 
+def parse_response_data(response_data: Dict) -> HTTPResponse:
+    """
+    Validate a response payload received from the client
+
+    Args:
+        response_data: Decoded "response" message data
+
+    Returns:
+        HTTPResponse model
+    """
+    return msgspec.convert(response_data, HTTPResponse)
+
+
 def deserialize_response(http_response: HTTPResponse) -> Dict:
     """
     Convert HTTPResponse model to dict for returning to client
@@ -139,43 +195,54 @@ def deserialize_response(http_response: HTTPResponse) -> Dict:
     Returns:
         Dictionary with response details
     """
-    body = None
-    if http_response.body:
-        if http_response.headers.get("x-tunnel-body-encoding") == "base64":
-            body = base64.b64decode(http_response.body)
-        else:
-            body = http_response.body.encode("utf-8") if isinstance(http_response.body, str) else http_response.body
-
     return {
         "status_code": http_response.status_code,
         "headers": http_response.headers,
-        "body": body
+        "body": http_response.body
     }
 
 
-def create_tunnel_message(msg_type: str, data: Optional[Dict] = None) -> str:
+def pack_tunnel_message(msg_type: str, data: Any = None) -> bytes:
     """
-    Create a WebSocket message
+    Create a binary WebSocket message
 
     Args:
         msg_type: Message type (request, response, ping, pong, error)
-        data: Message payload
+        data: Message payload (dict or wire Struct)
+
+    Returns:
+        msgpack-encoded bytes
+    """
+    return encoder.encode(TunnelMessage(type=msg_type, data=data))
+
+
+def unpack_tunnel_messages(payload: bytes) -> List[TunnelMessage]:
+    """
+    Parse a binary WebSocket frame
+
+    A frame holds either a single message or a batch (msgpack array) of
+    messages coalesced by the client.
+
+    Args:
+        payload: msgpack-encoded bytes
 
     Returns:
-        JSON string
+        List of TunnelMessage models
     """
-    message = TunnelMessage(type=msg_type, data=data)
-    return message.model_dump_json()
+    decoded = frame_decoder.decode(payload)
+    if isinstance(decoded, list):
+        return decoded
+    return [decoded]
 
 
-def parse_tunnel_message(message_str: str) -> TunnelMessage:
+def unpack_auth_message(payload: bytes) -> AuthMessage:
     """
-    Parse a WebSocket message
+    Parse the client's authentication message
 
     Args:
-        message_str: JSON string
+        payload: msgpack-encoded bytes
 
     Returns:
-        TunnelMessage model
+        AuthMessage model
     """
-    return TunnelMessage.model_validate_json(message_str)
+    return auth_decoder.decode(payload)
@@ -2,16 +2,34 @@
 Tunnel registry and lifecycle management
 """
 import asyncio
+import base64
+import itertools
 import secrets
-import string
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from zoneinfo import ZoneInfo
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import WebSocket
 from tunnel.tunnel_models import TunnelStatus, TunnelInfo
 from logs.logger import tunnel_logger
-import pytz
 
-PST = pytz.timezone("US/Pacific")
+PST = ZoneInfo("US/Pacific")
+
+# Current PST time, shared by callers within the same second
+_now_cache: Tuple[int, datetime] = (-1, datetime.min)
+
+
+def _now_pst() -> datetime:
+    """Get the current PST time at one-second resolution"""
+    global _now_cache
+    sec = int(time.time())
+    if _now_cache[0] != sec:
+        _now_cache = (sec, datetime.fromtimestamp(sec, tz=PST))
+    return _now_cache[1]
+
+
+class TunnelClosed(Exception):
+    """Set on pending requests when their tunnel is disconnected or deleted"""
 
 
 class TunnelConnection:
@@ -30,26 +48,39 @@ class TunnelConnection:
         self.name = name
         self.local_port = local_port
         self.metadata = metadata or {}
-        self.created_at = datetime.now(PST)
-        self.last_active = datetime.now(PST)
+        self.created_at = _now_pst()
+        self.last_active = self.created_at  # Display only, refreshed in to_info()
+        self._last_active_mono = time.monotonic()
         self.websocket: Optional[WebSocket] = None
         self.status = TunnelStatus.CONNECTING
-        self.pending_requests: Dict[str, asyncio.Future] = {}
+        self.pending_requests: Dict[int, asyncio.Future] = {}
         self.lock = asyncio.Lock()
+        self._request_counter = itertools.count()
+
+    def next_request_id(self) -> int:
+        """Get the next request ID (unique per tunnel)"""
+        return next(self._request_counter)
+
+    def take_pending_requests(self) -> List[Tuple[int, asyncio.Future]]:
+        """Remove and return all pending requests"""
+        pending = list(self.pending_requests.items())
+        self.pending_requests.clear()
+        return pending
 
     def update_activity(self):
         """Update last active timestamp"""
-        self.last_active = datetime.now(PST)
+        self._last_active_mono = time.monotonic()
 
     def is_expired(self, timeout_seconds: int) -> bool:
         """Check if tunnel has expired due to inactivity"""
         if self.status == TunnelStatus.DISCONNECTED:
             return True
-        elapsed = (datetime.now(PST) - self.last_active).total_seconds()
-        return elapsed > timeout_seconds
+        return time.monotonic() - self._last_active_mono > timeout_seconds
 
     def to_info(self) -> TunnelInfo:
         """Convert to TunnelInfo model"""
+        idle_seconds = time.monotonic() - self._last_active_mono
+        self.last_active = _now_pst() - timedelta(seconds=idle_seconds)
         return TunnelInfo(
             tunnel_id=self.tunnel_id,
             name=self.name,
@@ -71,9 +102,9 @@ class TunnelManager:
         self._cleanup_task: Optional[asyncio.Task] = None
 
     def generate_tunnel_id(self, length: int = 8) -> str:
-        """Generate a random tunnel ID"""
-        chars = string.ascii_lowercase + string.digits
-        return ''.join(secrets.choice(chars) for _ in range(length))
+        """Generate a random tunnel ID (lowercase base32: a-z, 2-7)"""
+        num_bytes = (length * 5 + 7) // 8
+        return base64.b32encode(secrets.token_bytes(num_bytes)).decode("ascii").lower()[:length]
 
     def generate_auth_token(self, length: int = 32) -> str:
         """Generate a random auth token"""
@@ -131,17 +162,17 @@ class TunnelManager:
         Returns:
             True if successful, False otherwise
         """
-        async with self.lock:
-            tunnel = self.tunnels.get(tunnel_id)
+        tunnel = self.tunnels.get(tunnel_id)
 
-            if not tunnel:
-                tunnel_logger.warning(f"Tunnel not found: {tunnel_id}")
-                return False
+        if not tunnel:
+            tunnel_logger.warning(f"Tunnel not found: {tunnel_id}")
+            return False
 
-            if tunnel.auth_token != auth_token:
-                tunnel_logger.warning(f"Invalid auth token for tunnel: {tunnel_id}")
-                return False
+        if tunnel.auth_token != auth_token:
+            tunnel_logger.warning(f"Invalid auth token for tunnel: {tunnel_id}")
+            return False
 
+        async with tunnel.lock:
             tunnel.websocket = websocket
             tunnel.status = TunnelStatus.ACTIVE
             tunnel.update_activity()
@@ -156,18 +187,19 @@ class TunnelManager:
         Args:
             tunnel_id: Tunnel identifier
         """
-        async with self.lock:
-            tunnel = self.tunnels.get(tunnel_id)
+        tunnel = self.tunnels.get(tunnel_id)
 
-            if tunnel:
+        if tunnel:
+            async with tunnel.lock:
                 tunnel.websocket = None
                 tunnel.status = TunnelStatus.DISCONNECTED
                 tunnel_logger.info(f"Disconnected tunnel: {tunnel_id}")
+                pending = tunnel.take_pending_requests()
 
-                # Cancel any pending requests
-                for request_id, future in tunnel.pending_requests.items():
-                    if not future.done():
-                        future.set_exception(Exception("Tunnel disconnected"))
+            # Fail any pending requests
+            for request_id, future in pending:
+                if not future.done():
+                    future.set_exception(TunnelClosed(f"Tunnel disconnected (request {request_id})"))
 
     async def delete_tunnel(self, tunnel_id: str) -> bool:
         """
@@ -181,24 +213,25 @@ class TunnelManager:
         """
         async with self.lock:
             tunnel = self.tunnels.pop(tunnel_id, None)
+            pending = tunnel.take_pending_requests() if tunnel else []
 
-            if tunnel:
-                # Close WebSocket if connected
-                if tunnel.websocket:
-                    try:
-                        await tunnel.websocket.close()
-                    except Exception as e:
-                        tunnel_logger.error(f"Error closing websocket for {tunnel_id}: {e}")
+        if tunnel:
+            # Close WebSocket if connected
+            if tunnel.websocket:
+                try:
+                    await tunnel.websocket.close()
+                except Exception as e:
+                    tunnel_logger.error(f"Error closing websocket for {tunnel_id}: {e}")
 
-                # Cancel pending requests
-                for request_id, future in tunnel.pending_requests.items():
-                    if not future.done():
-                        future.set_exception(Exception("Tunnel deleted"))
+            # Fail pending requests
+            for request_id, future in pending:
+                if not future.done():
+                    future.set_exception(TunnelClosed(f"Tunnel deleted (request {request_id})"))
 
-                tunnel_logger.info(f"Deleted tunnel: {tunnel_id}")
-                return True
+            tunnel_logger.info(f"Deleted tunnel: {tunnel_id}")
+            return True
 
-            return False
+        return False
 
     async def get_tunnel(self, tunnel_id: str) -> Optional[TunnelConnection]:
         """Get a tunnel by ID"""
@@ -206,24 +239,22 @@ class TunnelManager:
 
     async def list_tunnels(self) -> list[TunnelInfo]:
         """List all tunnels"""
-        async with self.lock:
-            return [tunnel.to_info() for tunnel in self.tunnels.values()]
+        return [tunnel.to_info() for tunnel in list(self.tunnels.values())]
 
     async def cleanup_expired_tunnels(self, timeout_seconds: int):
         """Clean up expired tunnels"""
-        async with self.lock:
-            expired = [
-                tunnel_id
-                for tunnel_id, tunnel in self.tunnels.items()
-                if tunnel.is_expired(timeout_seconds)
-            ]
-
-            for tunnel_id in expired:
-                tunnel_logger.info(f"Cleaning up expired tunnel: {tunnel_id}")
-                await self.delete_tunnel(tunnel_id)
-
-            if expired:
-                tunnel_logger.info(f"Cleaned up {len(expired)} expired tunnels")
+        expired = [
+            tunnel_id
+            for tunnel_id, tunnel in list(self.tunnels.items())
+            if tunnel.is_expired(timeout_seconds)
+        ]
+
+        for tunnel_id in expired:
+            tunnel_logger.info(f"Cleaning up expired tunnel: {tunnel_id}")
+            await self.delete_tunnel(tunnel_id)
+
+        if expired:
+            tunnel_logger.info(f"Cleaned up {len(expired)} expired tunnels")
 
     async def start_cleanup_task(self, cleanup_interval: int, timeout_seconds: int):
         """Start background task to clean up expired tunnels"""
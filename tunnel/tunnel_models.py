@@ -48,31 +48,6 @@ class TunnelListResponse(BaseModel):
     total: int
 
 
-class HTTPRequest(BaseModel):
-    """Serialized HTTP request to send through tunnel"""
-    request_id: str = Field(..., description="Unique request identifier")
-    method: str = Field(..., description="HTTP method")
-    path: str = Field(..., description="Request path")
-    headers: Dict[str, str] = Field(default_factory=dict, description="HTTP headers")
-    body: Optional[str] = Field(None, description="Request body (base64 encoded if binary)")
-    query_params: Dict[str, str] = Field(default_factory=dict, description="Query parameters")
-
-
-class HTTPResponse(BaseModel):
-    """Serialized HTTP response to return through tunnel"""
-    request_id: str = Field(..., description="Matching request identifier")
-    status_code: int = Field(..., description="HTTP status code")
-    headers: Dict[str, str] = Field(default_factory=dict, description="HTTP headers")
-    body: Optional[str] = Field(None, description="Response body (base64 encoded if binary)")
-
-
-class TunnelMessage(BaseModel):
-    """WebSocket message wrapper"""
-    type: str = Field(..., description="Message type: request, response, ping, pong, error")
-    data: Optional[Dict[str, Any]] = Field(None, description="Message payload")
-    timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
-
-
 class HeartbeatMessage(BaseModel):
     """Heartbeat ping/pong message"""
     type: str = "ping"
@@ -0,0 +1,54 @@
+"""
+msgspec wire types for tunnel WebSocket frames
+
+The Pydantic models in tunnel_models describe the REST API; these
+Structs are what travels over the tunnel, encoded as msgpack.
+"""
+from typing import Any, Dict, List, Optional, Union
+import msgspec
+
+
+class HTTPRequest(msgspec.Struct):
+    """Serialized HTTP request to send through tunnel"""
+    request_id: int
+    method: str
+    path: str
+    headers: Dict[str, str] = msgspec.field(default_factory=dict)
+    body: Optional[bytes] = None
+    query_params: Dict[str, str] = msgspec.field(default_factory=dict)
+    body_streamed: bool = False  # Body follows as body_chunk messages
+
+
+class BodyChunk(msgspec.Struct):
+    """Piece of a streamed request body (last one has final=True)"""
+    request_id: int
+    seq: int
+    data: bytes = b""
+    final: bool = False
+    aborted: bool = False  # Set on the final chunk when the body is incomplete
+
+
+class HTTPResponse(msgspec.Struct):
+    """Serialized HTTP response to return through tunnel"""
+    request_id: int
+    status_code: int
+    headers: Dict[str, str] = msgspec.field(default_factory=dict)
+    body: Optional[bytes] = None
+
+
+class TunnelMessage(msgspec.Struct):
+    """WebSocket message wrapper"""
+    type: str
+    data: Any = None
+    timestamp: Optional[str] = None
+
+
+class AuthMessage(msgspec.Struct):
+    """First message sent by the client after connecting"""
+    auth_token: Optional[str] = None
+
+
+# Codec singletons
+encoder = msgspec.msgpack.Encoder()
+frame_decoder = msgspec.msgpack.Decoder(Union[List[TunnelMessage], TunnelMessage])
+auth_decoder = msgspec.msgpack.Decoder(AuthMessage)